@@ -0,0 +1,57 @@
+"""
+Convert the trained TensorFlow SavedModel to ONNX format
+The Flask API serves model.onnx through ONNX Runtime when it is present
+"""
+
+import os
+import subprocess
+import sys
+
+def convert_model():
+    """Convert SavedModel to ONNX with tf2onnx"""
+
+    input_path = 'models/isl_angles_model/saved_model'
+    output_path = 'models/isl_angles_model/model.onnx'
+
+    print("=" * 70)
+    print("Converting TensorFlow Model to ONNX Format")
+    print("=" * 70)
+
+    if not os.path.exists(input_path):
+        print(f"❌ Error: Input model not found at {input_path}")
+        return False
+
+    print(f"\n📂 Input:  {input_path}")
+    print(f"📂 Output: {output_path}")
+
+    try:
+        cmd = [
+            sys.executable, '-m', 'tf2onnx.convert',
+            '--saved-model', input_path,
+            '--output', output_path,
+            '--opset', '17'
+        ]
+
+        print("\n🔄 Converting model...")
+        result = subprocess.run(cmd, capture_output=True, text=True)
+
+        if result.returncode == 0:
+            print("✅ Conversion successful!")
+            print(f"\n📦 Model saved to: {output_path}")
+            print("\nInstall onnxruntime and restart prediction_api.py to serve it")
+            return True
+        else:
+            print("❌ tf2onnx conversion failed")
+            print(f"Error: {result.stderr}")
+            return False
+
+    except Exception as e:
+        print(f"❌ Conversion failed: {e}")
+        print("\nAlternative: You can manually convert using:")
+        print(f"  python -m tf2onnx.convert --saved-model {input_path} \\")
+        print(f"    --output {output_path} --opset 17")
+        return False
+
+if __name__ == '__main__':
+    success = convert_model()
+    sys.exit(0 if success else 1)
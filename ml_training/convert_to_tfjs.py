@@ -7,6 +7,9 @@ import os
 import subprocess
 import sys
 
+# 1 MB shards cache individually in the browser; float16 halves weight bytes
+WEIGHT_SHARD_SIZE_BYTES = 1048576
+
 def convert_model():
     """Convert SavedModel to TensorFlow.js format"""
     
@@ -35,6 +38,8 @@ def convert_model():
             '--output_format=tfjs_graph_model',
             '--signature_name=serving_default',
             '--saved_model_tags=serve',
+            '--quantize_float16',
+            f'--weight_shard_size_bytes={WEIGHT_SHARD_SIZE_BYTES}',
             input_path,
             output_path
         ]
@@ -47,8 +52,9 @@ def convert_model():
             print(f"\n📦 Model files saved to: {output_path}")
             print("\nNext steps:")
             print(f"1. Copy the tfjs_model folder to: webapp/public/models/isl/")
-            print(f"2. Copy labels.json, features.json, and scaler.json from models/isl_angles_model/")
+            print(f"2. Copy labels.json, features.json (and scaler.json, if present) from models/isl_angles_model/")
             print(f"3. Update CameraPanel.jsx to load and use the model")
+            print(f"   (tf.loadGraphModel, then model.save('indexeddb://isl') so repeat visits skip the download)")
             return True
         else:
             print("⚠️  tensorflowjs converter failed, trying alternative method...")
@@ -59,6 +65,7 @@ def convert_model():
         print(f"❌ Conversion failed: {e}")
         print("\nAlternative: You can manually convert using:")
         print(f"  tensorflowjs_converter --input_format=tf_saved_model \\")
+        print(f"    --quantize_float16 --weight_shard_size_bytes={WEIGHT_SHARD_SIZE_BYTES} \\")
         print(f"    {input_path} \\")
         print(f"    {output_path}")
         return False
@@ -0,0 +1,102 @@
+"""
+Convert the trained SavedModel to a TensorFlow Lite model with int8 weights
+The Flask API picks up model_int8.tflite automatically for CPU inference
+"""
+
+import json
+import sys
+import numpy as np
+import pandas as pd
+import tensorflow as tf
+from pathlib import Path
+
+MODEL_DIR = Path('models/isl_angles_model')
+DATASET_PATH = 'hand_angles_datasets.csv'
+NUM_EVALUATION_SAMPLES = 2000
+MAX_ACCURACY_DROP = 0.01  # refuse to write the int8 model if it loses more than this
+
+def load_evaluation_data():
+    """Labelled features, as the model receives them, used to check int8 accuracy"""
+    with open(MODEL_DIR / 'features.json', 'r') as f:
+        feature_names = json.load(f)['feature_names']
+    with open(MODEL_DIR / 'labels.json', 'r') as f:
+        labels = json.load(f)['labels']
+
+    df = pd.read_csv(DATASET_PATH)
+    sample = df.sample(n=min(NUM_EVALUATION_SAMPLES, len(df)), random_state=42)
+    X = np.nan_to_num(sample[feature_names].values.astype(np.float32), nan=0.0)
+    y = sample['label'].map({label: i for i, label in enumerate(labels)}).values
+
+    # Older models expect externally standardized input; newer ones normalize in-graph
+    scaler_path = MODEL_DIR / 'scaler.json'
+    if scaler_path.exists():
+        with open(scaler_path, 'r') as f:
+            scaler = json.load(f)
+        X = (X - np.asarray(scaler['mean'], dtype=np.float32)) / np.asarray(scaler['scale'], dtype=np.float32)
+    return X.astype(np.float32), y
+
+def saved_model_predictions(saved_model_path, X):
+    """Class predictions of the float SavedModel"""
+    serving_fn = tf.saved_model.load(str(saved_model_path)).signatures['serving_default']
+    input_name = next(iter(serving_fn.structured_input_signature[1]))
+    outputs = serving_fn(**{input_name: tf.constant(X)})
+    return np.argmax(next(iter(outputs.values())).numpy(), axis=1)
+
+def tflite_predictions(tflite_model, X):
+    """Class predictions of a serialized TFLite model"""
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    input_index = interpreter.get_input_details()[0]['index']
+    interpreter.resize_tensor_input(input_index, X.shape)
+    interpreter.allocate_tensors()
+    interpreter.set_tensor(input_index, X)
+    interpreter.invoke()
+    return np.argmax(interpreter.get_tensor(interpreter.get_output_details()[0]['index']), axis=1)
+
+def convert_model():
+    """Quantize saved_model to model_int8.tflite"""
+
+    input_path = MODEL_DIR / 'saved_model'
+    output_path = MODEL_DIR / 'model_int8.tflite'
+
+    print("=" * 70)
+    print("Converting SavedModel to TensorFlow Lite (int8 weights)")
+    print("=" * 70)
+
+    if not input_path.exists():
+        print(f"❌ Error: Input model not found at {input_path}")
+        return False
+
+    print(f"\n📂 Input:  {input_path}")
+    print(f"📂 Output: {output_path}")
+
+    try:
+        # Dynamic-range quantization: int8 weights, float32 input/output and
+        # activations, so the model's Normalization layer sees exact raw angles
+        converter = tf.lite.TFLiteConverter.from_saved_model(str(input_path))
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+        print("\n🔄 Converting model...")
+        tflite_model = converter.convert()
+
+        X_eval, y_eval = load_evaluation_data()
+        float_accuracy = np.mean(saved_model_predictions(input_path, X_eval) == y_eval)
+        int8_accuracy = np.mean(tflite_predictions(tflite_model, X_eval) == y_eval)
+        print(f"✓ Accuracy on {len(X_eval)} samples: float {float_accuracy*100:.2f}%, int8 {int8_accuracy*100:.2f}%")
+        if float_accuracy - int8_accuracy > MAX_ACCURACY_DROP:
+            print(f"❌ int8 model loses more than {MAX_ACCURACY_DROP*100:.1f} points of accuracy, not saving it")
+            return False
+
+        output_path.write_bytes(tflite_model)
+
+        print("✅ Conversion successful!")
+        print(f"\n📦 Model saved to: {output_path} ({len(tflite_model) / 1024:.1f} KB)")
+        print("\nRestart prediction_api.py to serve predictions from the int8 model")
+        return True
+
+    except Exception as e:
+        print(f"❌ Conversion failed: {e}")
+        return False
+
+if __name__ == '__main__':
+    success = convert_model()
+    sys.exit(0 if success else 1)
@@ -8,6 +8,16 @@ import json
 import numpy as np
 from pathlib import Path
 
+# Round weights through float16 before export; lossless in practice for this MLP
+QUANTIZE_FP16 = True
+
+def quantize_weights_fp16(model):
+    """Round-trip every float32 weight through float16 in place"""
+    for w in model.weights:
+        value = w.numpy()
+        if value.dtype == np.float32:
+            w.assign(value.astype(np.float16).astype(np.float32))
+
 def export_model_for_web():
     """Export Keras model to web-friendly format"""
     
@@ -20,12 +30,24 @@ def export_model_for_web():
     print("=" * 70)
     
     # Load the trained model
-    print(f"\n[1/3] Loading model from {model_path}...")
+    print(f"\n[1/4] Loading model from {model_path}...")
+    if not Path(model_path).exists():
+        print(f"❌ Error: {model_path} not found")
+        print("   Retrain with: python train_hand_angles.py --dataset hand_angles_datasets.csv --keep_keras")
+        return
     model = tf.keras.models.load_model(model_path)
     print("✓ Model loaded successfully")
     
+    # Quantize weights to float16 precision
+    print(f"\n[2/4] Quantizing weights...")
+    if QUANTIZE_FP16:
+        quantize_weights_fp16(model)
+        print("✓ Weights rounded to float16 precision")
+    else:
+        print("✓ Skipped (QUANTIZE_FP16 is disabled)")
+    
     # Save in TensorFlow.js Layers format (the simpler approach)
-    print(f"\n[2/3] Saving model in TensorFlow.js Layers format...")
+    print(f"\n[3/4] Saving model in TensorFlow.js Layers format...")
     web_model_path = output_dir / 'model'
     
     # Create model config
@@ -42,22 +64,20 @@ def export_model_for_web():
         }, f, indent=2)
     print(f"✓ Model architecture saved to {architecture_path}")
     
-    # Export model weights in a simple format
-    weights_data = {}
+    # Export the actual weight tensors as a single compressed .npz blob
+    arrays = {}
     for i, layer in enumerate(model.layers):
-        layer_weights = layer.get_weights()
-        if layer_weights:
-            weights_data[f'layer_{i}_{layer.name}'] = {
-                'shapes': [w.shape for w in layer_weights],
-                'dtypes': [str(w.dtype) for w in layer_weights]
-            }
+        for j, w in enumerate(layer.get_weights()):
+            if QUANTIZE_FP16 and w.dtype == np.float32:
+                w = w.astype(np.float16)
+            arrays[f'l{i}_{layer.name}_{j}'] = w
     
-    weights_path = output_dir / 'weights_info.json'
-    with open(weights_path, 'w') as f:
-        json.dump(weights_data, f, indent=2)
-    print(f"✓ Weights info saved to {weights_path}")
+    weights_path = output_dir / 'weights.npz'
+    np.savez_compressed(weights_path, **arrays)
+    print(f"✓ Weights saved to {weights_path} ({len(arrays)} arrays)")
     
     # Copy metadata files
+    print(f"\n[4/4] Copying metadata...")
     import shutil
     for filename in ['labels.json', 'features.json', 'scaler.json']:
         src = Path(f'models/isl_angles_model/{filename}')
@@ -0,0 +1,35 @@
+"""
+Gunicorn configuration for the ISL prediction API
+
+Usage:
+    gunicorn -c gunicorn.conf.py prediction_api:app
+"""
+
+import os
+
+# Keep each worker's TensorFlow / TFLite thread pools small so N workers
+# don't oversubscribe the CPU. Must be set before prediction_api imports TF.
+os.environ.setdefault('TF_NUM_INTEROP_THREADS', '1')
+os.environ.setdefault('TF_NUM_INTRAOP_THREADS', '2')
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# Import the app (and TensorFlow) and read model metadata once in the master.
+# The inference runtime is built in each worker after fork, see post_worker_init.
+preload_app = True
+
+# Each worker loads TensorFlow and holds its own full copy of the model, so
+# keep the default small; raise WEB_CONCURRENCY on hosts with spare memory.
+# (os.cpu_count() reports host CPUs inside containers, so it's no guide here.)
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = 4
+
+# Seconds a worker may go without checking in before the master restarts it.
+# Covers slow requests and each worker's model load and warmup at startup.
+timeout = 120
+
+def post_worker_init(worker):
+    """Load the model and warm up inference in the freshly forked worker"""
+    import prediction_api
+    prediction_api.ensure_runtime()
@@ -0,0 +1,133 @@
+"""
+Hand angle feature extraction from MediaPipe landmarks
+Python port of webapp/src/utils/handAngles.js, vectorized over many samples
+
+Landmarks are (N, 21, 3) float32 arrays of normalized (x, y, z) points.
+Uses a parallel Numba kernel when numba is installed, NumPy otherwise.
+"""
+
+import math
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+# Landmark indices [base, joint1, joint2, tip] for each finger
+FINGER_LANDMARKS = np.array([
+    [1, 2, 3, 4],      # thumb
+    [5, 6, 7, 8],      # index finger
+    [9, 10, 11, 12],   # middle finger
+    [13, 14, 15, 16],  # ring finger
+    [17, 18, 19, 20]   # pinky
+])
+
+# Wrist -> index base, wrist -> pinky base, wrist -> middle finger MCP
+ORIENTATION_LANDMARKS = np.array([5, 17, 9])
+
+NUM_HAND_FEATURES = 8
+
+# Column order of hand_angles_datasets.csv
+FEATURE_NAMES = ['both_hands'] + [
+    name.format(side)
+    for side in ['Left', 'Right']
+    for name in [
+        'thumb_{}', 'index_finger_{}', 'middle_finger_{}', 'ring_finger_{}', 'pinky_{}',
+        'palm_angle_{}_left', 'palm_angle_{}_right', 'hand_{}_ground_angle'
+    ]
+]
+
+def _joint_angles_numpy(p1, p2, p3):
+    """Angle at p2 in degrees, 0 where undefined (matches calculateAngle in JS)"""
+    v1 = p1 - p2
+    v2 = p3 - p2
+    # The web app uses the raw z of the outer points, not a z difference
+    v1[..., 2] = p1[..., 2]
+    v2[..., 2] = p3[..., 2]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cos = np.sum(v1 * v2, axis=-1) / (np.linalg.norm(v1, axis=-1) * np.linalg.norm(v2, axis=-1))
+        angles = np.degrees(np.arccos(cos))
+    angles[np.isnan(angles)] = 0.0
+    return angles
+
+def _hand_angles_numpy(landmarks, out):
+    """NumPy fallback for compute_hand_angles"""
+    fingers = landmarks[:, FINGER_LANDMARKS]  # (N, 5, 4, 3)
+    out[:, :5] = 0.5 * (
+        _joint_angles_numpy(fingers[:, :, 0], fingers[:, :, 1], fingers[:, :, 2]) +
+        _joint_angles_numpy(fingers[:, :, 1], fingers[:, :, 2], fingers[:, :, 3])
+    )
+
+    d = landmarks[:, ORIENTATION_LANDMARKS, :2] - landmarks[:, None, 0, :2]
+    out[:, 5:8] = np.abs(np.degrees(np.arctan2(d[..., 1], d[..., 0])))
+    return out
+
+if numba is not None:
+    @numba.njit(cache=True, error_model='numpy')
+    def _joint_angle_numba(lm, i, j, k):
+        v1x = lm[i, 0] - lm[j, 0]
+        v1y = lm[i, 1] - lm[j, 1]
+        v1z = lm[i, 2]
+        v2x = lm[k, 0] - lm[j, 0]
+        v2y = lm[k, 1] - lm[j, 1]
+        v2z = lm[k, 2]
+
+        dot = v1x * v2x + v1y * v2y + v1z * v2z
+        mag1 = math.sqrt(v1x * v1x + v1y * v1y + v1z * v1z)
+        mag2 = math.sqrt(v2x * v2x + v2y * v2y + v2z * v2z)
+        angle = math.degrees(math.acos(dot / (mag1 * mag2)))
+        return 0.0 if math.isnan(angle) else angle
+
+    # Fast-math without the no-NaN/no-Inf assumptions, which would let LLVM
+    # drop the isnan check that zeroes degenerate angles
+    @numba.njit(cache=True, parallel=True, error_model='numpy',
+                fastmath={'nsz', 'arcp', 'contract', 'afn', 'reassoc'})
+    def _hand_angles_numba(landmarks, out):
+        for n in numba.prange(landmarks.shape[0]):
+            lm = landmarks[n]
+            for f in range(5):
+                j = FINGER_LANDMARKS[f]
+                out[n, f] = 0.5 * (_joint_angle_numba(lm, j[0], j[1], j[2]) +
+                                   _joint_angle_numba(lm, j[1], j[2], j[3]))
+            for o in range(3):
+                p = ORIENTATION_LANDMARKS[o]
+                out[n, 5 + o] = abs(math.degrees(math.atan2(lm[p, 1] - lm[0, 1], lm[p, 0] - lm[0, 0])))
+        return out
+
+def compute_hand_angles(landmarks, out=None):
+    """
+    Compute the 8 per-hand angle features for a batch of hands
+
+    Args:
+        landmarks: (N, 21, 3) array of landmarks
+        out: optional preallocated (N, 8) float32 array
+
+    Returns:
+        (N, 8) float32 array: 5 finger angles, 2 palm angles, ground angle
+    """
+    landmarks = np.ascontiguousarray(landmarks, dtype=np.float32)
+    if out is None:
+        out = np.empty((len(landmarks), NUM_HAND_FEATURES), dtype=np.float32)
+    if numba is not None:
+        return _hand_angles_numba(landmarks, out)
+    return _hand_angles_numpy(landmarks, out)
+
+def extract_hand_angles(left_landmarks, right_landmarks):
+    """
+    Build the 17-column feature matrix in FEATURE_NAMES order
+
+    Rows where a hand was not detected should be NaN in that hand's array;
+    their features are set to 0, as the web app does.
+    """
+    X = np.zeros((len(left_landmarks), len(FEATURE_NAMES)), dtype=np.float32)
+    present = []
+    for h, landmarks in enumerate([left_landmarks, right_landmarks]):
+        cols = slice(1 + h * NUM_HAND_FEATURES, 1 + (h + 1) * NUM_HAND_FEATURES)
+        compute_hand_angles(landmarks, out=X[:, cols])
+        mask = ~np.isnan(landmarks).any(axis=(1, 2))
+        X[~mask, cols] = 0.0
+        present.append(mask)
+    X[:, 0] = present[0] & present[1]
+    return X
@@ -32,12 +32,14 @@ try:
     
     print(f"\n🔄 Converting model from {input_path} to {output_path}...")
     
-    converter.convert(
-        [input_path],
-        output_path,
-        input_format='tf_saved_model',
-        output_format='tfjs_graph_model'
-    )
+    converter.convert([
+        '--input_format=tf_saved_model',
+        '--output_format=tfjs_graph_model',
+        '--quantize_float16',
+        '--weight_shard_size_bytes=1048576',
+        input_path,
+        output_path
+    ])
     
     print("\n✅ Conversion successful!")
     print(f"\n📦 Model files saved to: {output_path}")
@@ -0,0 +1,37 @@
+"""
+Mixed precision setup shared by the training scripts
+
+Under mixed_float16, models keep their softmax output layer in float32 so
+the loss stays numerically stable, and wrap their optimizer with
+loss_scale_optimizer() so small float16 gradients don't underflow to zero.
+"""
+
+import tensorflow as tf
+from tensorflow import keras
+
+def configure_mixed_precision():
+    """
+    Enable the mixed_float16 policy when every GPU has Tensor Cores
+
+    Falls back to float32 on CPU-only machines, GPUs below compute
+    capability 7.0, and GTX 16xx cards (no Tensor Cores, slower in FP16)
+
+    Returns:
+        Name of the global policy that was set
+    """
+    policy = 'float32'
+    gpus = tf.config.list_physical_devices('GPU')
+    if gpus:
+        details = [tf.config.experimental.get_device_details(gpu) for gpu in gpus]
+        if all(d.get('compute_capability', (0, 0)) >= (7, 0) and
+               'GTX 16' not in d.get('device_name', '') for d in details):
+            policy = 'mixed_float16'
+
+    keras.mixed_precision.set_global_policy(policy)
+    return policy
+
+def loss_scale_optimizer(optimizer):
+    """Wrap optimizer with dynamic loss scaling when the mixed_float16 policy is active"""
+    if keras.mixed_precision.global_policy().name == 'mixed_float16':
+        return keras.mixed_precision.LossScaleOptimizer(optimizer)
+    return optimizer
@@ -3,14 +3,26 @@ Flask API for ISL Hand Sign Recognition
 Serves predictions from the trained TensorFlow model
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request
 from flask_cors import CORS
 import tensorflow as tf
 import numpy as np
+import orjson
 import json
+import operator
 import os
+import queue
+import threading
+import time
+from collections import Counter
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
 from pathlib import Path
 
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
 app = Flask(__name__)
 
 # Configure CORS for both development and production
@@ -28,57 +40,339 @@ CORS(app, origins=allowed_origins, supports_credentials=True)
 
 # Load model and metadata on startup
 MODEL_DIR = Path('models/isl_angles_model')
+TOP_K = 5  # number of ranked predictions returned per request
+METADATA_MAX_AGE = 86400  # browser/CDN cache lifetime for /api/labels and /api/features
 model = None
+infer = None
+infer_input = None  # (MAX_BATCH_SIZE, num_features) buffer multi-row batches are padded into for infer
+runtime_model = None  # TFLiteModel or OnnxModel when an exported model is available
 labels = None
 feature_names = None
-scaler = None
+feature_getter = None
+scaler_inv_scale = None  # None when the model normalizes its own inputs
+scaler_offset = None  # -mean / scale, so standardization is X * inv_scale + offset
+streamer = None
+runtime_pid = None  # process that built model / infer / runtime_model
+runtime_lock = threading.Lock()
+labels_response = None  # pre-serialized /api/labels body
+features_response = None  # pre-serialized /api/features body
+
+# Micro-batching: concurrent requests are coalesced into one model call
+MAX_BATCH_SIZE = 32
+BATCH_TIMEOUT = 0.005  # seconds to wait for more requests to join a batch
+BATCH_LOG_INTERVAL = 1000  # print the batch-size histogram every N batches
+PREDICTION_TIMEOUT = 10  # seconds a request waits for its batch before giving up
+MAX_REQUEST_ROWS = 256  # most rows accepted by one /api/predict/batch request
+
+class PredictionStreamer:
+    """
+    Collects feature vectors submitted by request threads and runs them
+    through the model in batches on a single background worker thread.
+    """
+
+    def __init__(self, predict_fn, num_features, max_batch_size=MAX_BATCH_SIZE,
+                 batch_timeout=BATCH_TIMEOUT):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max_batch_size
+        self.batch_timeout = batch_timeout
+        # Reused input buffer, filled in place by the worker for each batch
+        self._buffer = np.empty((max_batch_size, num_features), dtype=np.float32)
+        self.batch_sizes = Counter()
+        self._queue = None
+        self._worker = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def submit(self, feature_vector):
+        """Queue a single feature vector and return a Future for its predictions"""
+        if feature_vector.shape != self._buffer.shape[1:]:
+            raise ValueError(
+                f'Expected {self._buffer.shape[1]} numeric features, got shape {feature_vector.shape}'
+            )
+        future = Future()
+        self._ensure_worker().put((feature_vector, future))
+        return future
+
+    def _ensure_worker(self):
+        # Threads do not survive fork (gunicorn --preload), so each worker
+        # process starts its own batching thread on first use
+        with self._lock:
+            if self._pid != os.getpid() or not self._worker.is_alive():
+                self._queue = queue.Queue()
+                self._pid = os.getpid()
+                self._worker = threading.Thread(
+                    target=self._run, args=(self._queue,), daemon=True
+                )
+                self._worker.start()
+            return self._queue
+
+    def _collect_batch(self, q):
+        items = [q.get()]
+        deadline = time.monotonic() + self.batch_timeout
+        while len(items) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                items.append(q.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return items
+
+    def _run(self, q):
+        while True:
+            items = self._collect_batch(q)
+            # A row that can't be copied fails only its own request; an
+            # exception escaping here would kill the thread and strand every
+            # queued Future
+            futures = []
+            for features, future in items:
+                try:
+                    self._buffer[len(futures)] = features
+                except Exception as e:
+                    future.set_exception(e)
+                    continue
+                futures.append(future)
+            if not futures:
+                continue
+
+            try:
+                predictions = self.predict_fn(self._buffer[:len(futures)])
+            except Exception as e:
+                for future in futures:
+                    future.set_exception(e)
+                continue
+
+            for future, row in zip(futures, predictions):
+                future.set_result(row)
+
+            self.batch_sizes[len(futures)] += 1
+            if sum(self.batch_sizes.values()) % BATCH_LOG_INTERVAL == 0:
+                print(f"📊 Batch sizes: {dict(sorted(self.batch_sizes.items()))}")
+
+class TFLiteModel:
+    """
+    TFLite interpreter (int8 weights; int8 I/O from older full-integer
+    exports is (de)quantized here) with its input fixed at the max batch shape.
+    Smaller batches are padded so allocate_tensors() only runs once.
+    """
+
+    def __init__(self, model_path, num_features, max_batch_size=MAX_BATCH_SIZE):
+        self.interpreter = tf.lite.Interpreter(
+            model_path=str(model_path),
+            num_threads=int(os.environ.get('TF_NUM_INTRAOP_THREADS', os.cpu_count()))
+        )
+        input_index = self.interpreter.get_input_details()[0]['index']
+        self.interpreter.resize_tensor_input(input_index, [max_batch_size, num_features])
+        self.interpreter.allocate_tensors()
+
+        self.input_details = self.interpreter.get_input_details()[0]
+        self.output_details = self.interpreter.get_output_details()[0]
+        self._input = np.zeros((max_batch_size, num_features), dtype=self.input_details['dtype'])
+
+    def __call__(self, X_scaled):
+        n = len(X_scaled)
+        in_scale, in_zero_point = self.input_details['quantization']
+        if self.input_details['dtype'] == np.int8:
+            q = np.round(X_scaled / in_scale + in_zero_point)
+            self._input[:n] = np.clip(q, -128, 127)
+        else:
+            self._input[:n] = X_scaled
+
+        self.interpreter.set_tensor(self.input_details['index'], self._input)
+        self.interpreter.invoke()
+        output = self.interpreter.get_tensor(self.output_details['index'])[:n]
+
+        out_scale, out_zero_point = self.output_details['quantization']
+        if self.output_details['dtype'] == np.int8:
+            output = (output.astype(np.float32) - out_zero_point) * out_scale
+        return output
+
+class OnnxModel:
+    """ONNX Runtime session for the model exported by convert_to_onnx.py"""
+
+    def __init__(self, model_path):
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = int(os.environ.get('TF_NUM_INTRAOP_THREADS', os.cpu_count()))
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=['CPUExecutionProvider']
+        )
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, X_scaled):
+        return self.session.run(None, {self.input_name: X_scaled})[0]
+
+def json_response(payload, status=200):
+    """Serialize a payload with orjson, which handles numpy scalars natively"""
+    return app.response_class(
+        orjson.dumps(payload, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS),
+        status=status,
+        mimetype='application/json'
+    )
+
+def cached_json_response(body):
+    """Return pre-serialized metadata that never changes after startup"""
+    return app.response_class(
+        body,
+        mimetype='application/json',
+        headers={'Cache-Control': f'public, max-age={METADATA_MAX_AGE}'}
+    )
+
+def format_prediction(predictions):
+    """Build the response payload from one row of class probabilities"""
+    # Select the top-k classes without sorting the full distribution
+    k = min(TOP_K, len(predictions))
+    top_idx = np.argpartition(predictions, -k)[-k:]
+    top_idx = top_idx[np.argsort(-predictions[top_idx])]
+    all_predictions = [
+        {'sign': labels[i], 'confidence': predictions[i]}
+        for i in top_idx
+    ]
+    
+    return {
+        'predicted_sign': all_predictions[0]['sign'],
+        'confidence': all_predictions[0]['confidence'],
+        'all_predictions': all_predictions
+    }
+
+def _infer_batch(X):
+    """Standardize a (batch, num_features) array and run the model on it"""
+    if scaler_inv_scale is not None:
+        X_scaled = X * scaler_inv_scale
+        X_scaled += scaler_offset
+    else:
+        X_scaled = X
+    if runtime_model is not None:
+        return runtime_model(X_scaled)
+    # XLA compiles one program per input shape, so multi-row batches are
+    # padded to MAX_BATCH_SIZE and only two shapes are ever compiled
+    n = len(X_scaled)
+    if n > 1:
+        infer_input[:n] = X_scaled
+        return infer(tf.constant(infer_input)).numpy()[:n]
+    return infer(tf.constant(X_scaled)).numpy()
+
+def predict_batch(X):
+    """Run a batch through this process's inference runtime"""
+    ensure_runtime()
+    return _infer_batch(X)
 
 def load_model_and_metadata():
-    """Load the trained model and associated metadata"""
-    global model, labels, feature_names, scaler
+    """Load labels, features and scaler; the model itself is loaded per process"""
+    global labels, feature_names, feature_getter, scaler_inv_scale, scaler_offset, streamer
+    global labels_response, features_response
     
     print("=" * 70)
-    print("🔄 Loading ISL model...")
+    print("🔄 Loading ISL model metadata...")
     print("=" * 70)
     
-    # Load model
-    model_path = MODEL_DIR / 'model.keras'
-    print(f"📂 Model path: {model_path}")
-    model = tf.keras.models.load_model(model_path)
-    print(f"✓ Model loaded successfully")
-    
     # Load labels
     with open(MODEL_DIR / 'labels.json', 'r') as f:
         label_data = json.load(f)
         labels = label_data['labels']
+    labels_response = orjson.dumps({'labels': labels, 'num_classes': len(labels)})
     print(f"✓ Loaded {len(labels)} labels")
     
     # Load feature names
     with open(MODEL_DIR / 'features.json', 'r') as f:
         feature_data = json.load(f)
         feature_names = feature_data['feature_names']
+    feature_getter = operator.itemgetter(*feature_names)
+    features_response = orjson.dumps({'features': feature_names, 'num_features': len(feature_names)})
     print(f"✓ Loaded {len(feature_names)} features")
     
-    # Load scaler parameters
-    with open(MODEL_DIR / 'scaler.json', 'r') as f:
-        scaler = json.load(f)
-    print("✓ Loaded scaler parameters")
+    # Load scaler parameters (models trained with a Normalization layer have none)
+    scaler_path = MODEL_DIR / 'scaler.json'
+    if scaler_path.exists():
+        with open(scaler_path, 'r') as f:
+            scaler = json.load(f)
+        scaler_mean = np.asarray(scaler['mean'], dtype=np.float32)
+        scaler_inv_scale = (1.0 / np.asarray(scaler['scale'], dtype=np.float32)).astype(np.float32)
+        scaler_offset = (-scaler_mean * scaler_inv_scale).astype(np.float32)
+        print("✓ Loaded scaler parameters")
+    else:
+        scaler_inv_scale = scaler_offset = None
+        print("✓ No scaler.json, model normalizes its own inputs")
+    
+    streamer = PredictionStreamer(predict_batch, len(feature_names))
+    print(f"✓ Batching up to {MAX_BATCH_SIZE} requests per {BATCH_TIMEOUT * 1000:.0f} ms")
+
+def load_runtime():
+    """Load the model, build the inference runtime and warm it up"""
+    global model, infer, infer_input, runtime_model
+    
+    # Load model (training only writes model.keras with --keep_keras)
+    model_path = MODEL_DIR / 'model.keras'
+    if not model_path.exists():
+        model_path = MODEL_DIR / 'saved_model'
+    print(f"📂 Model path: {model_path} (pid {os.getpid()})")
+    if model_path.suffix == '.keras':
+        model = tf.keras.models.load_model(model_path)
+        call_model = lambda x: model(x, training=False)
+    else:
+        model = tf.saved_model.load(str(model_path))
+        serving_fn = model.signatures['serving_default']
+        # Input names differ between model.export() and tf.saved_model.save() exports
+        input_name = next(iter(serving_fn.structured_input_signature[1]))
+        output_name = next(iter(serving_fn.structured_outputs))
+        call_model = lambda x: serving_fn(**{input_name: x})[output_name]
+    print(f"✓ Model loaded successfully")
+    
+    # Prefer exported runtimes when available: int8 TFLite, then ONNX Runtime
+    tflite_path = MODEL_DIR / 'model_int8.tflite'
+    onnx_path = MODEL_DIR / 'model.onnx'
+    if tflite_path.exists():
+        runtime_model = TFLiteModel(tflite_path, len(feature_names))
+        print(f"✓ Loaded int8 TFLite model from {tflite_path}")
+    elif onnx_path.exists() and ort is not None:
+        runtime_model = OnnxModel(onnx_path)
+        print(f"✓ Loaded ONNX Runtime session from {onnx_path}")
+    else:
+        runtime_model = None
+        # Trace a single XLA-compiled inference function instead of going
+        # through model.predict's per-call Keras scaffolding
+        infer = tf.function(call_model, jit_compile=True).get_concrete_function(tf.TensorSpec([None, len(feature_names)], tf.float32))
+        infer_input = np.zeros((MAX_BATCH_SIZE, len(feature_names)), dtype=np.float32)
+        print("✓ Compiled inference function")
+    
+    # Warm up the two shapes inference runs at (single rows, and batches
+    # padded to MAX_BATCH_SIZE) so XLA compilation and kernel selection
+    # happen before the first real request
+    for batch_size in (1, MAX_BATCH_SIZE):
+        _infer_batch(np.zeros((batch_size, len(feature_names)), dtype=np.float32))
+    print(f"✓ Warmed up inference for batch sizes 1 and {MAX_BATCH_SIZE}")
     
     print("=" * 70)
     print("🚀 ISL Recognition API Ready!")
     print("=" * 70)
 
-# Load model when module is imported (for gunicorn --preload)
+def ensure_runtime():
+    """
+    Load the runtime once per process. TensorFlow and TFLite thread pools
+    do not survive fork(), so a runtime built in the gunicorn master would
+    hang in its workers; each worker builds its own after forking.
+    """
+    global runtime_pid
+    if runtime_pid == os.getpid():
+        return
+    with runtime_lock:
+        if runtime_pid != os.getpid():
+            load_runtime()
+            runtime_pid = os.getpid()
+
+# Load metadata when module is imported (for gunicorn --preload); the model
+# runtime is built in each worker by the post_worker_init hook in gunicorn.conf.py
 print("🌐 Initializing Flask app...")
 load_model_and_metadata()
 
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({
+    return json_response({
         'status': 'healthy',
         'model_loaded': model is not None,
-        'num_classes': len(labels) if labels else 0
+        'num_classes': len(labels) if labels else 0,
+        'batch_sizes': dict(streamer.batch_sizes) if streamer else {}
     })
 
 @app.route('/api/predict', methods=['POST'])
@@ -108,77 +402,139 @@ def predict():
     }
     """
     try:
-        data = request.json
+        data = orjson.loads(request.get_data())
         
         if 'features' not in data:
-            return jsonify({'error': 'Missing features in request'}), 400
+            return json_response({'error': 'Missing features in request'}, 400)
         
         features_dict = data['features']
         
-        # Validate features
-        if len(features_dict) != len(feature_names):
-            return jsonify({
-                'error': f'Expected {len(feature_names)} features, got {len(features_dict)}'
-            }), 400
+        # Validate and extract features in correct order in a single pass
+        try:
+            feature_vector = feature_getter(features_dict)
+        except KeyError as e:
+            return json_response({'error': f'Missing feature: {e.args[0]}'}, 400)
+        except TypeError:
+            return json_response({'error': 'features must be an object mapping feature names to values'}, 400)
         
-        # Extract features in correct order
-        feature_vector = []
-        for feature_name in feature_names:
-            if feature_name not in features_dict:
-                return jsonify({'error': f'Missing feature: {feature_name}'}), 400
-            feature_vector.append(features_dict[feature_name])
+        # Queue for batched prediction and wait for this request's row
+        try:
+            future = streamer.submit(np.asarray(feature_vector, dtype=np.float32))
+        except ValueError as e:
+            return json_response({'error': f'Invalid features: {e}'}, 400)
+        predictions = future.result(timeout=PREDICTION_TIMEOUT)
         
-        # Convert to numpy array and standardize
-        X = np.array([feature_vector], dtype=np.float32)
-        X_scaled = (X - np.array(scaler['mean'])) / np.array(scaler['scale'])
+        return json_response(format_prediction(predictions))
+        
+    except FutureTimeoutError:
+        return json_response({'error': 'Prediction timed out'}, 503)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+@app.route('/api/predict/batch', methods=['POST'])
+def predict_many():
+    """
+    Predict ISL signs for several samples in one request
+    
+    Expects JSON body with feature rows already in /api/features order:
+    {
+        "features": [
+            [1, 45.2, 90.1, ...],
+            [0, 12.7, 33.4, ...]
+        ]
+    }
+    
+    At most MAX_REQUEST_ROWS rows are accepted per request.
+    
+    Returns:
+    {
+        "predictions": [ {same payload as /api/predict}, ... ]
+    }
+    """
+    try:
+        data = orjson.loads(request.get_data())
         
-        # Make prediction
-        predictions = model.predict(X_scaled, verbose=0)[0]
+        if 'features' not in data:
+            return json_response({'error': 'Missing features in request'}, 400)
         
-        # Get top prediction
-        predicted_idx = np.argmax(predictions)
-        predicted_sign = labels[predicted_idx]
-        confidence = float(predictions[predicted_idx])
+        try:
+            X = np.asarray(data['features'], dtype=np.float32)
+        except (TypeError, ValueError):
+            X = None
+        if X is None or X.ndim != 2 or len(X) == 0 or X.shape[1] != len(feature_names):
+            return json_response({
+                'error': f'Expected a non-empty list of rows with {len(feature_names)} numeric features each'
+            }, 400)
+        if len(X) > MAX_REQUEST_ROWS:
+            return json_response({
+                'error': f'Too many rows: {len(X)} (limit is {MAX_REQUEST_ROWS} per request)'
+            }, 400)
         
-        # Get all predictions sorted by confidence
-        all_predictions = [
-            {'sign': labels[i], 'confidence': float(predictions[i])}
-            for i in range(len(labels))
-        ]
-        all_predictions.sort(key=lambda x: x['confidence'], reverse=True)
+        # Rows join the shared batching queue alongside single requests
+        futures = [streamer.submit(row) for row in X]
         
-        return jsonify({
-            'predicted_sign': predicted_sign,
-            'confidence': confidence,
-            'all_predictions': all_predictions[:5]  # Top 5
+        # One deadline for the whole request, not one timeout per row
+        deadline = time.monotonic() + PREDICTION_TIMEOUT
+        return json_response({
+            'predictions': [
+                format_prediction(future.result(timeout=max(0.0, deadline - time.monotonic())))
+                for future in futures
+            ]
         })
         
+    except FutureTimeoutError:
+        return json_response({'error': 'Prediction timed out'}, 503)
+    except Exception as e:
+        return json_response({'error': str(e)}, 500)
+
+@app.route('/api/predict/raw', methods=['POST'])
+def predict_raw():
+    """
+    Predict ISL sign from a binary feature vector
+    
+    Expects an application/octet-stream body of little-endian float32
+    values in the order returned by /api/features (17 × 4 = 68 bytes).
+    Skips JSON parsing and per-feature lookups entirely.
+    
+    Returns the same JSON payload as /api/predict
+    """
+    try:
+        body = request.get_data()
+        expected_bytes = len(feature_names) * 4
+        if len(body) != expected_bytes:
+            return json_response({
+                'error': f'Expected {expected_bytes} bytes ({len(feature_names)} float32 features), got {len(body)}'
+            }, 400)
+        
+        feature_vector = np.frombuffer(body, dtype='<f4')
+        predictions = streamer.submit(feature_vector).result(timeout=PREDICTION_TIMEOUT)
+        
+        return json_response(format_prediction(predictions))
+        
+    except FutureTimeoutError:
+        return json_response({'error': 'Prediction timed out'}, 503)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return json_response({'error': str(e)}, 500)
 
 @app.route('/api/labels', methods=['GET'])
 def get_labels():
     """Get all available sign labels"""
-    return jsonify({
-        'labels': labels,
-        'num_classes': len(labels)
-    })
+    return cached_json_response(labels_response)
 
 @app.route('/api/features', methods=['GET'])
 def get_features():
     """Get required feature names"""
-    return jsonify({
-        'features': feature_names,
-        'num_features': len(feature_names)
-    })
+    return cached_json_response(features_response)
 
 if __name__ == '__main__':
-    load_model_and_metadata()
+    ensure_runtime()
     
     # Run server
     port = 5000
     print(f"\n🌐 Starting server on http://localhost:{port}")
     print("   POST /api/predict - Get sign prediction")
+    print("   POST /api/predict/batch - Get sign predictions for several samples")
+    print("   POST /api/predict/raw - Get sign prediction (binary float32 body)")
     print("   GET  /api/labels  - Get all sign labels")
     print("   GET  /api/features - Get feature names")
     print("   GET  /health      - Health check")
@@ -3,16 +3,28 @@ Quick test script to verify your ISL dataset structure and extract sample landma
 
 Usage:
     python test_dataset.py --dataset_path ./isl_dataset
+    python test_dataset.py --dataset_path ./isl_dataset --landmarker_model hand_landmarker.task --gpu
 """
 
 import os
 import cv2
+import numpy as np
 import mediapipe as mp
 from pathlib import Path
 import argparse
+from concurrent.futures import ProcessPoolExecutor
+from mediapipe.framework.formats import landmark_pb2
 
 mp_hands = mp.solutions.hands
 mp_drawing = mp.solutions.drawing_utils
+hands = None  # created per worker process by _init_worker
+landmarker = None  # HandLandmarker used instead of hands when a .task model is given
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+def is_image_file(filename):
+    """Check a filename against the supported image extensions"""
+    return os.path.splitext(filename)[1].lower() in IMAGE_EXTENSIONS
 
 def test_dataset_structure(dataset_path):
     """Check if dataset is properly structured"""
@@ -38,66 +50,137 @@ def test_dataset_structure(dataset_path):
     
     total_images = 0
     for folder in sorted(class_folders):
-        images = list(folder.glob('*.jpg')) + list(folder.glob('*.jpeg')) + list(folder.glob('*.png'))
+        images = [entry.name for entry in os.scandir(folder)
+                  if entry.is_file() and is_image_file(entry.name)]
         print(f"  {folder.name}: {len(images)} images")
         total_images += len(images)
     
     print(f"\nTotal images: {total_images}")
     return True
 
-def test_landmark_extraction(dataset_path, num_samples=5):
+def _init_worker(landmarker_model=None, use_gpu=False):
+    """
+    Create one hand detector per worker process
+    
+    Uses the MediaPipe Tasks HandLandmarker (optionally on the GPU delegate)
+    when a hand_landmarker.task model is given, else the legacy Hands solution
+    """
+    global hands, landmarker
+    if landmarker_model:
+        from mediapipe.tasks.python import BaseOptions, vision
+        delegate = BaseOptions.Delegate.GPU if use_gpu else BaseOptions.Delegate.CPU
+        options = vision.HandLandmarkerOptions(
+            base_options=BaseOptions(model_asset_path=landmarker_model, delegate=delegate),
+            running_mode=vision.RunningMode.IMAGE,
+            num_hands=1,
+            min_hand_detection_confidence=0.5
+        )
+        landmarker = vision.HandLandmarker.create_from_options(options)
+    else:
+        hands = mp_hands.Hands(
+            static_image_mode=True,
+            max_num_hands=1,
+            min_detection_confidence=0.5
+        )
+
+def _detect_hand(image_rgb):
+    """Return the first hand's NormalizedLandmarkList, or None if no hand"""
+    if landmarker is not None:
+        result = landmarker.detect(mp.Image(image_format=mp.ImageFormat.SRGB, data=image_rgb))
+        if not result.hand_landmarks:
+            return None
+        landmarks = landmark_pb2.NormalizedLandmarkList()
+        landmarks.landmark.extend([
+            landmark_pb2.NormalizedLandmark(x=p.x, y=p.y, z=p.z)
+            for p in result.hand_landmarks[0]
+        ])
+        return landmarks
+    
+    results = hands.process(image_rgb)
+    if not results.multi_hand_landmarks:
+        return None
+    return results.multi_hand_landmarks[0]
+
+def _process_one(task):
+    """
+    Run landmark extraction on a single image inside a worker process
+    
+    Returns a dict with the image shape, number of landmarks found and the
+    annotated output path (or None if the image could not be read / no hand)
+    """
+    i, img_path, read_flag = task
+    result = {'shape': None, 'num_landmarks': 0, 'output_path': None}
+    
+    image = cv2.imread(str(img_path), read_flag)
+    if image is None:
+        return result
+    result['shape'] = image.shape
+    
+    # Reverse channel order (BGR -> RGB) in a single contiguous copy
+    image_rgb = np.ascontiguousarray(image[:, :, ::-1])
+    landmarks = _detect_hand(image_rgb)
+    
+    if landmarks is not None:
+        result['num_landmarks'] = len(landmarks.landmark)
+        
+        # Draw landmarks on image
+        annotated_image = image.copy()
+        mp_drawing.draw_landmarks(
+            annotated_image,
+            landmarks,
+            mp_hands.HAND_CONNECTIONS
+        )
+        
+        # Save annotated image
+        output_path = f"test_output_{i+1}.jpg"
+        cv2.imwrite(output_path, annotated_image)
+        result['output_path'] = output_path
+    
+    return result
+
+def test_landmark_extraction(dataset_path, num_samples=5, workers=None, half_res=False,
+                             landmarker_model=None, use_gpu=False):
     """Test MediaPipe landmark extraction on sample images"""
     dataset_path = Path(dataset_path)
     
     print(f"\nTesting landmark extraction on {num_samples} sample images...")
     
-    hands = mp_hands.Hands(
-        static_image_mode=True,
-        max_num_hands=1,
-        min_detection_confidence=0.5
-    )
-    
     # Get all image files
-    all_images = list(dataset_path.rglob('*.jpg')) + \
-                 list(dataset_path.rglob('*.jpeg')) + \
-                 list(dataset_path.rglob('*.png'))
+    all_images = [Path(dirpath) / filename
+                  for dirpath, _, filenames in os.walk(dataset_path)
+                  for filename in filenames if is_image_file(filename)]
     
     if not all_images:
         print("❌ No images found!")
         return
     
-    # Test first few images
+    # Halve decode resolution for large source images (landmarks are normalized)
+    read_flag = cv2.IMREAD_REDUCED_COLOR_2 if half_res else cv2.IMREAD_COLOR
+    tasks = [(i, img_path, read_flag) for i, img_path in enumerate(all_images[:num_samples])]
+    
+    # Images are independent, so process them across worker processes
+    # (no pool at all when --num_samples selects nothing)
+    results = []
+    if tasks:
+        max_workers = max(1, min(workers or os.cpu_count(), len(tasks)))
+        chunksize = max(1, min(8, len(tasks) // max_workers))
+        with ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                 initargs=(landmarker_model, use_gpu)) as executor:
+            results = list(executor.map(_process_one, tasks, chunksize=chunksize))
+    
     success_count = 0
-    for i, img_path in enumerate(all_images[:num_samples]):
+    for (i, img_path, _), result in zip(tasks, results):
         print(f"\nTesting image {i+1}/{num_samples}: {img_path.name}")
         
-        image = cv2.imread(str(img_path))
-        if image is None:
+        if result['shape'] is None:
             print(f"  ❌ Could not read image")
             continue
         
-        print(f"  Image shape: {image.shape}")
-        
-        image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        results = hands.process(image_rgb)
+        print(f"  Image shape: {result['shape']}")
         
-        if results.multi_hand_landmarks:
-            landmarks = results.multi_hand_landmarks[0]
-            print(f"  ✓ Hand detected! {len(landmarks.landmark)} landmarks extracted")
-            
-            # Draw landmarks on image
-            annotated_image = image.copy()
-            mp_drawing.draw_landmarks(
-                annotated_image,
-                landmarks,
-                mp_hands.HAND_CONNECTIONS
-            )
-            
-            # Save annotated image
-            output_path = f"test_output_{i+1}.jpg"
-            cv2.imwrite(output_path, annotated_image)
-            print(f"  Saved annotated image to: {output_path}")
-            
+        if result['num_landmarks']:
+            print(f"  ✓ Hand detected! {result['num_landmarks']} landmarks extracted")
+            print(f"  Saved annotated image to: {result['output_path']}")
             success_count += 1
         else:
             print(f"  ❌ No hand detected in this image")
@@ -121,6 +204,14 @@ def main():
                        help='Path to ISL dataset folder')
     parser.add_argument('--num_samples', type=int, default=5,
                        help='Number of sample images to test')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Worker processes for landmark extraction (default: CPU count)')
+    parser.add_argument('--half_res', action='store_true',
+                       help='Decode images at half resolution (faster for large images)')
+    parser.add_argument('--landmarker_model', type=str, default=None,
+                       help='Path to hand_landmarker.task to use the MediaPipe Tasks HandLandmarker')
+    parser.add_argument('--gpu', action='store_true',
+                       help='Run the HandLandmarker on the GPU delegate')
     
     args = parser.parse_args()
     
@@ -131,7 +222,9 @@ def main():
     # Test structure
     if test_dataset_structure(args.dataset_path):
         # Test landmark extraction
-        test_landmark_extraction(args.dataset_path, args.num_samples)
+        test_landmark_extraction(args.dataset_path, args.num_samples,
+                                 args.workers, args.half_res,
+                                 args.landmarker_model, args.gpu)
 
 if __name__ == '__main__':
     main()
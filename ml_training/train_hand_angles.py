@@ -10,19 +10,22 @@ Dataset format: CSV with columns:
 
 Usage:
     python train_hand_angles.py --dataset hand_angles_datasets.csv --epochs 100
+
+Multi-GPU (Horovod):
+    horovodrun -np 4 python train_hand_angles.py --dataset hand_angles_datasets.csv --horovod
 """
 
-import pandas as pd
+import pyarrow.csv as pacsv
 import numpy as np
 import tensorflow as tf
 from tensorflow import keras
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder, StandardScaler
-import matplotlib.pyplot as plt
+from sklearn.preprocessing import LabelEncoder
 import json
 import argparse
 from pathlib import Path
 
+from precision import configure_mixed_precision, loss_scale_optimizer
+
 def load_hand_angles_dataset(csv_path):
     """
     Load ISL dataset from CSV with hand angle features
@@ -34,20 +37,25 @@ def load_hand_angles_dataset(csv_path):
         label_encoder: Fitted LabelEncoder
     """
     print(f"Loading dataset from {csv_path}...")
-    df = pd.read_csv(csv_path)
+    table = pacsv.read_csv(
+        csv_path,
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=1 << 20)
+    )
     
-    print(f"✓ Loaded {len(df)} samples")
-    print(f"✓ Columns: {list(df.columns)}")
+    print(f"✓ Loaded {table.num_rows} samples")
+    print(f"✓ Columns: {table.column_names}")
     
     # Extract label column
-    if 'label' not in df.columns:
+    if 'label' not in table.column_names:
         raise ValueError("Dataset must have a 'label' column")
     
-    labels = df['label'].values
+    labels = table.column('label').to_numpy(zero_copy_only=False)
     
-    # Get feature columns (all except 'label')
-    feature_columns = [col for col in df.columns if col != 'label']
-    X = df[feature_columns].values
+    # Get feature columns (all except 'label') straight into a float32 matrix
+    feature_columns = [col for col in table.column_names if col != 'label']
+    X = np.empty((table.num_rows, len(feature_columns)), dtype=np.float32)
+    for j, col in enumerate(feature_columns):
+        X[:, j] = table.column(col).to_numpy(zero_copy_only=False)
     
     # Encode labels
     label_encoder = LabelEncoder()
@@ -60,51 +68,142 @@ def load_hand_angles_dataset(csv_path):
     print(f"  Labels: {list(label_encoder.classes_)}")
     
     # Show class distribution
-    unique, counts = np.unique(y, return_counts=True)
-    print(f"\n📈 Class Distribution:")
-    for idx, count in zip(unique, counts):
-        print(f"  {label_encoder.classes_[idx]}: {count} samples")
+    counts = np.bincount(y, minlength=len(label_encoder.classes_))
+    print(f"\n📈 Class Distribution:\n" + "\n".join(
+        f"  {name}: {count} samples" for name, count in zip(label_encoder.classes_, counts)
+    ))
     
     return X, y, feature_columns, label_encoder
 
-def create_model(num_features, num_classes):
+def split_by_class(y, num_classes, test_size, seed=42):
+    """
+    Stratified train/validation split as per-class index arrays
+    
+    Only the shuffled int64 indices are materialized, never a copy of X.
+    """
+    rng = np.random.default_rng(seed)
+    train_idx_by_class, val_idx_by_class = [], []
+    for c in range(num_classes):
+        idx = rng.permutation(np.flatnonzero(y == c))
+        num_val = int(round(len(idx) * test_size))
+        val_idx_by_class.append(idx[:num_val])
+        train_idx_by_class.append(idx[num_val:])
+    return train_idx_by_class, val_idx_by_class
+
+def shard_by_class(idx_by_class, num_shards, shard_index):
+    """
+    Disjoint per-class slice of the indices for one Horovod worker
+    
+    Every worker takes exactly len(idx) // num_shards samples of each class,
+    so all workers run the same number of steps per epoch; a worker with an
+    extra batch would block forever in the allreduce at the end of the epoch.
+    """
+    return [idx[shard_index::num_shards][:len(idx) // num_shards] for idx in idx_by_class]
+
+def make_dataset(X, y, idx_by_class, batch_size, shuffle=False, num_shards=1, shard_index=0):
+    """
+    Build a tf.data pipeline over per-class index arrays into X and y:
+    (shard) -> (per-class shuffle + sample_from_datasets) -> batch -> gather -> prefetch
+    
+    X and y are float32 / int32 tensors shared by every pipeline; batches
+    gather their rows, so neither split holds its own copy of the features.
+    Shuffled pipelines interleave classes in proportion to their size and
+    still visit every sample once per epoch.
+    Sharding gives each Horovod worker a disjoint, equally sized slice of
+    every class (see shard_by_class).
+    """
+    if num_shards > 1:
+        idx_by_class = shard_by_class(idx_by_class, num_shards, shard_index)
+    idx_by_class = [idx for idx in idx_by_class if len(idx) > 0]
+    if shuffle:
+        num_samples = sum(len(idx) for idx in idx_by_class)
+        ds = tf.data.Dataset.sample_from_datasets(
+            [
+                tf.data.Dataset.from_tensor_slices(idx).shuffle(len(idx), reshuffle_each_iteration=True)
+                for idx in idx_by_class
+            ],
+            weights=[len(idx) / num_samples for idx in idx_by_class]
+        )
+    else:
+        ds = tf.data.Dataset.from_tensor_slices(np.concatenate(idx_by_class))
+    ds = ds.batch(batch_size).map(
+        lambda idx: (tf.gather(X, idx), tf.gather(y, idx)),
+        num_parallel_calls=tf.data.AUTOTUNE
+    ).prefetch(tf.data.AUTOTUNE)
+    
+    options = tf.data.Options()
+    # Validation batches must keep their order to line up with labels
+    options.deterministic = not shuffle
+    options.experimental_optimization.map_and_batch_fusion = True
+    return ds.with_options(options)
+
+def create_model(num_features, num_classes, X_train, hvd=None):
     """
     Create neural network for hand angle classification
+    
+    Standardization is baked into the model as a Normalization layer adapted
+    on X_train (an array or a dataset of feature batches), so the exported
+    SavedModel / TF.js model takes raw angles.
+    When hvd (horovod.tensorflow.keras) is given, the learning rate is scaled
+    by the number of workers and gradients are averaged with allreduce
     """
+    # Per-feature mean/variance become graph constants (kept in float32)
+    normalizer = keras.layers.Normalization(axis=-1, dtype='float32')
+    normalizer.adapt(X_train)
+    
     model = keras.Sequential([
         keras.layers.Input(shape=(num_features,)),
+        normalizer,
         
         # Batch normalization for stable training
         keras.layers.BatchNormalization(),
         
+        # Hidden blocks: Dense -> BatchNorm -> ReLU -> Dropout
+        # (no Dense bias, BatchNorm's shift replaces it)
+        
         # First hidden layer
-        keras.layers.Dense(256, activation='relu'),
-        keras.layers.Dropout(0.4),
+        keras.layers.Dense(256, use_bias=False),
         keras.layers.BatchNormalization(),
+        keras.layers.ReLU(),
+        keras.layers.Dropout(0.4),
         
         # Second hidden layer
-        keras.layers.Dense(128, activation='relu'),
-        keras.layers.Dropout(0.3),
+        keras.layers.Dense(128, use_bias=False),
         keras.layers.BatchNormalization(),
+        keras.layers.ReLU(),
+        keras.layers.Dropout(0.3),
         
         # Third hidden layer
-        keras.layers.Dense(64, activation='relu'),
+        keras.layers.Dense(64, use_bias=False),
+        keras.layers.BatchNormalization(),
+        keras.layers.ReLU(),
         keras.layers.Dropout(0.2),
         
-        # Output layer
-        keras.layers.Dense(num_classes, activation='softmax')
+        # Output layer (float32 under mixed precision, see precision.py)
+        keras.layers.Dense(num_classes, activation='softmax', dtype='float32')
     ])
     
+    optimizer = keras.optimizers.Adam(learning_rate=0.001 * (hvd.size() if hvd else 1))
+    if hvd is not None:
+        optimizer = hvd.DistributedOptimizer(optimizer)
+    optimizer = loss_scale_optimizer(optimizer)
+    
     model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        optimizer=optimizer,
         loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=['accuracy'],
+        # XLA fuses each Dense/BatchNorm/ReLU block. Horovod's allreduce ops
+        # have no XLA kernels, so distributed runs keep the regular graph.
+        jit_compile=hvd is None
     )
     
     return model
 
 def plot_training_history(history, output_dir):
     """Plot and save training metrics"""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
     fig, axes = plt.subplots(1, 2, figsize=(14, 5))
     
     # Accuracy plot
@@ -130,13 +229,29 @@ def plot_training_history(history, output_dir):
     plt.savefig(save_path, dpi=150, bbox_inches='tight')
     print(f"✓ Training history saved to {save_path}")
 
-def plot_confusion_matrix(y_true, y_pred, label_names, output_dir):
+def compute_confusion_matrix(model, dataset, num_classes):
+    """
+    Accumulate a confusion matrix over a batched (features, labels) dataset
+    
+    The forward pass and argmax run in a tf.function called per batch on the
+    model's device, so only int32 class indices come back to the host
+    """
+    @tf.function
+    def predict_classes(x):
+        return tf.argmax(model(x, training=False), axis=-1, output_type=tf.int32)
+    
+    cm = tf.zeros((num_classes, num_classes), dtype=tf.int32)
+    for x, y_true in dataset:
+        cm += tf.math.confusion_matrix(y_true, predict_classes(x), num_classes=num_classes, dtype=tf.int32)
+    return cm.numpy()
+
+def plot_confusion_matrix(cm, label_names, output_dir):
     """Plot confusion matrix"""
-    from sklearn.metrics import confusion_matrix
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
     import seaborn as sns
     
-    cm = confusion_matrix(y_true, y_pred)
-    
     plt.figure(figsize=(max(10, len(label_names)), max(8, len(label_names) * 0.8)))
     sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', 
                 xticklabels=label_names, yticklabels=label_names,
@@ -150,21 +265,34 @@ def plot_confusion_matrix(y_true, y_pred, label_names, output_dir):
     plt.savefig(save_path, dpi=150, bbox_inches='tight')
     print(f"✓ Confusion matrix saved to {save_path}")
 
-def save_model_and_metadata(model, label_encoder, feature_names, scaler, output_dir):
+def save_model_and_metadata(model, label_encoder, feature_names, output_dir, keep_keras=False):
     """Save model and all necessary metadata"""
     output_path = Path(output_dir)
     output_path.mkdir(parents=True, exist_ok=True)
     
-    # Save TensorFlow model in Keras format
-    model_path = output_path / 'model.keras'
-    model.save(model_path)
-    print(f"✓ Model saved to {model_path}")
-    
-    # Also export for TensorFlow.js conversion
+    # Export a single SavedModel with one explicit inference signature; this is
+    # what the API, TFLite/ONNX converters and tensorflowjs_converter consume
     export_path = output_path / 'saved_model'
-    model.export(export_path)
+    serve = tf.function(
+        lambda angles: model(angles, training=False),
+        input_signature=[tf.TensorSpec([None, len(feature_names)], tf.float32, name='angles')]
+    )
+    tf.saved_model.save(
+        model, str(export_path),
+        signatures={'serving_default': serve.get_concrete_function()}
+    )
     print(f"✓ Model exported to {export_path}")
     
+    # The .keras file is only needed by export_for_web.py and for fine-tuning
+    model_path = output_path / 'model.keras'
+    if keep_keras:
+        model.save(model_path)
+        print(f"✓ Model saved to {model_path}")
+    elif model_path.exists():
+        # Don't leave a model.keras from an older run next to the new SavedModel
+        model_path.unlink()
+        print(f"✓ Removed stale {model_path}")
+    
     # Save label mapping
     labels_path = output_path / 'labels.json'
     with open(labels_path, 'w') as f:
@@ -183,22 +311,70 @@ def save_model_and_metadata(model, label_encoder, feature_names, scaler, output_
         }, f, indent=2)
     print(f"✓ Feature names saved to {features_path}")
     
-    # Save scaler parameters
-    scaler_path = output_path / 'scaler.json'
-    with open(scaler_path, 'w') as f:
-        json.dump({
-            'mean': scaler.mean_.tolist(),
-            'scale': scaler.scale_.tolist()
-        }, f, indent=2)
-    print(f"✓ Scaler parameters saved to {scaler_path}")
+    # Normalization now lives in the model; a leftover scaler.json from an
+    # older run would make the API standardize inputs twice. Runtime exports
+    # of the previous model would be served ahead of the new SavedModel.
+    for stale_name in ['scaler.json', 'model_int8.tflite', 'model.onnx']:
+        stale_path = output_path / stale_name
+        if stale_path.exists():
+            stale_path.unlink()
+            print(f"✓ Removed stale {stale_path}")
     
     print("\n" + "="*70)
     print("To convert to TensorFlow.js format, run:")
     print(f"tensorflowjs_converter --input_format=tf_saved_model \\")
-    print(f"  {model_path} \\")
+    print(f"  {export_path} \\")
     print(f"  {output_path}/tfjs_model")
     print("="*70)
 
+def tflite_accuracy(tflite_model, dataset):
+    """Top-1 accuracy of a serialized TFLite model over a batched (features, labels) dataset"""
+    interpreter = tf.lite.Interpreter(model_content=tflite_model)
+    input_index = interpreter.get_input_details()[0]['index']
+    output_index = interpreter.get_output_details()[0]['index']
+    
+    correct = total = 0
+    input_shape = None
+    for x, y in dataset:
+        x = x.numpy()
+        if x.shape != input_shape:
+            interpreter.resize_tensor_input(input_index, x.shape)
+            interpreter.allocate_tensors()
+            input_shape = x.shape
+        interpreter.set_tensor(input_index, x)
+        interpreter.invoke()
+        predictions = np.argmax(interpreter.get_tensor(output_index), axis=1)
+        correct += int(np.sum(predictions == y.numpy()))
+        total += len(x)
+    return correct / total
+
+def export_int8_tflite(output_dir, val_ds, float_accuracy, max_accuracy_drop=0.01):
+    """
+    Quantize the exported SavedModel's weights to int8 as model_int8.tflite
+    
+    Dynamic-range quantization keeps float32 input, output and activations,
+    so the in-graph Normalization layer sees exact raw angles; full-integer
+    quantization would squeeze all 17 raw features through one input scale.
+    The file is only written if validation accuracy stays within
+    max_accuracy_drop of the float model, since the Flask API serves it in
+    preference to TensorFlow.
+    """
+    export_path = Path(output_dir) / 'saved_model'
+    tflite_path = Path(output_dir) / 'model_int8.tflite'
+    
+    converter = tf.lite.TFLiteConverter.from_saved_model(str(export_path))
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    tflite_model = converter.convert()
+    
+    int8_accuracy = tflite_accuracy(tflite_model, val_ds)
+    print(f"✓ int8 TFLite validation accuracy: {int8_accuracy*100:.2f}% (float: {float_accuracy*100:.2f}%)")
+    if float_accuracy - int8_accuracy > max_accuracy_drop:
+        print(f"⚠️  Accuracy dropped by more than {max_accuracy_drop*100:.1f} points, not writing {tflite_path}")
+        return
+    
+    tflite_path.write_bytes(tflite_model)
+    print(f"✓ int8 TFLite model saved to {tflite_path} ({len(tflite_model) / 1024:.1f} KB)")
+
 def main():
     parser = argparse.ArgumentParser(description='Train ISL hand angles classifier')
     parser.add_argument('--dataset', type=str, required=True,
@@ -211,6 +387,12 @@ def main():
                        help='Batch size for training')
     parser.add_argument('--test_size', type=float, default=0.2,
                        help='Fraction of data for validation')
+    parser.add_argument('--horovod', action='store_true',
+                       help='Data-parallel multi-GPU training (launch with horovodrun)')
+    parser.add_argument('--keep_keras', action='store_true',
+                       help='Also save model.keras (needed by export_for_web.py)')
+    parser.add_argument('--no_tflite', action='store_true',
+                       help='Skip the int8 TFLite export used by the prediction API')
     
     args = parser.parse_args()
     
@@ -218,52 +400,94 @@ def main():
     print("ISL Hand Angles Classifier Training")
     print("="*70)
     
+    hvd = None
+    if args.horovod:
+        import horovod.tensorflow.keras as hvd
+        hvd.init()
+        # Pin each process to a single GPU
+        gpus = tf.config.list_physical_devices('GPU')
+        if gpus:
+            tf.config.set_visible_devices(gpus[hvd.local_rank()], 'GPU')
+        print(f"\n🔗 Horovod worker {hvd.rank() + 1}/{hvd.size()}")
+    is_chief = hvd is None or hvd.rank() == 0
+    
+    policy = configure_mixed_precision()
+    print(f"\n⚙️  Precision policy: {policy}")
+    tf.config.optimizer.set_experimental_options({
+        'layout_optimizer': True,
+        'remapping': True
+    })
+    
     # Load dataset
     print("\n[1/6] Loading dataset...")
     X, y, feature_names, label_encoder = load_hand_angles_dataset(args.dataset)
     
-    # Check for missing values
-    if np.isnan(X).any():
+    # Check for missing values (filled in place to avoid copying X)
+    nan_mask = np.isnan(X)
+    if nan_mask.any():
         print("\n⚠️  Warning: Dataset contains NaN values. Filling with 0...")
-        X = np.nan_to_num(X, nan=0.0)
+        X[nan_mask] = 0.0
+    del nan_mask
     
-    # Standardize features
-    print("\n[2/6] Standardizing features...")
-    scaler = StandardScaler()
-    X_scaled = scaler.fit_transform(X)
-    print(f"✓ Features standardized (mean=0, std=1)")
+    num_features = X.shape[1]
+    num_classes = len(label_encoder.classes_)
     
     # Split dataset
-    print("\n[3/6] Splitting dataset...")
-    X_train, X_val, y_train, y_val = train_test_split(
-        X_scaled, y, test_size=args.test_size, random_state=42, stratify=y
+    print("\n[2/6] Splitting dataset...")
+    train_idx_by_class, val_idx_by_class = split_by_class(y, num_classes, args.test_size)
+    train_idx = np.concatenate(train_idx_by_class)
+    print(f"✓ Training samples: {len(train_idx)}")
+    print(f"✓ Validation samples: {sum(len(idx) for idx in val_idx_by_class)}")
+    
+    # Convert to tensors once; both splits and adapt() gather from these buffers
+    X_t = tf.constant(X, dtype=tf.float32)
+    y_t = tf.constant(y, dtype=tf.int32)
+    
+    if hvd is not None:
+        # Every worker must run the same number of steps per epoch
+        steps_per_rank = {
+            -(-sum(len(idx) for idx in shard_by_class(train_idx_by_class, hvd.size(), rank)) // args.batch_size)
+            for rank in range(hvd.size())
+        }
+        assert len(steps_per_rank) == 1, f"Unequal batches per Horovod worker: {steps_per_rank}"
+    
+    train_ds = make_dataset(
+        X_t, y_t, train_idx_by_class, args.batch_size, shuffle=True,
+        num_shards=hvd.size() if hvd else 1, shard_index=hvd.rank() if hvd else 0
     )
-    print(f"✓ Training samples: {len(X_train)}")
-    print(f"✓ Validation samples: {len(X_val)}")
+    val_ds = make_dataset(X_t, y_t, val_idx_by_class, args.batch_size)
     
     # Create model
-    print("\n[4/6] Creating model...")
-    num_features = X.shape[1]
-    num_classes = len(label_encoder.classes_)
-    model = create_model(num_features, num_classes)
+    print("\n[3/6] Creating model...")
+    # Adapt on the full (unsharded) training split so every worker agrees
+    train_features = make_dataset(X_t, y_t, train_idx_by_class, args.batch_size).map(lambda x, _: x)
+    model = create_model(num_features, num_classes, train_features, hvd)
     
     print(f"\n📐 Model Architecture:")
     model.summary()
     
     # Train model
-    print("\n[5/6] Training model...")
+    print("\n[4/6] Training model...")
+    callbacks = []
+    if hvd is not None:
+        # Start all workers from rank 0's weights and average metrics across them
+        callbacks += [
+            hvd.callbacks.BroadcastGlobalVariablesCallback(0),
+            hvd.callbacks.MetricAverageCallback()
+        ]
+    
+    early_stopping = keras.callbacks.EarlyStopping(
+        monitor='val_loss',
+        patience=15,
+        restore_best_weights=True,
+        verbose=1
+    )
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=args.epochs,
-        batch_size=args.batch_size,
-        callbacks=[
-            keras.callbacks.EarlyStopping(
-                monitor='val_loss',
-                patience=15,
-                restore_best_weights=True,
-                verbose=1
-            ),
+        callbacks=callbacks + [
+            early_stopping,
             keras.callbacks.ReduceLROnPlateau(
                 monitor='val_loss',
                 factor=0.5,
@@ -272,13 +496,26 @@ def main():
                 min_lr=1e-6
             )
         ],
-        verbose=1
+        verbose=1 if is_chief else 0
     )
     
-    # Evaluate
-    print("\n[6/6] Evaluating model...")
-    train_loss, train_acc = model.evaluate(X_train, y_train, verbose=0)
-    val_loss, val_acc = model.evaluate(X_val, y_val, verbose=0)
+    # Only the first Horovod worker evaluates and writes outputs
+    if not is_chief:
+        return
+    
+    # tf.keras 2.x only restores the best weights when training actually
+    # stops early; restore them explicitly so a run that uses every epoch
+    # also ends on the epoch reported (and saved) below
+    if early_stopping.best_weights is not None:
+        model.set_weights(early_stopping.best_weights)
+    
+    # Evaluate using the metrics of the best epoch, whose weights are restored
+    print("\n[5/6] Evaluating model...")
+    best_epoch = int(np.argmin(history.history['val_loss']))
+    train_acc = history.history['accuracy'][best_epoch]
+    train_loss = history.history['loss'][best_epoch]
+    val_acc = history.history['val_accuracy'][best_epoch]
+    val_loss = history.history['val_loss'][best_epoch]
     
     print(f"\n{'='*70}")
     print(f"📊 Final Results:")
@@ -288,16 +525,22 @@ def main():
     print(f"  Validation Loss:     {val_loss:.4f}")
     print(f"{'='*70}")
     
-    # Generate predictions for confusion matrix
-    y_pred = np.argmax(model.predict(X_val, verbose=0), axis=1)
+    # Confusion matrix over the validation pipeline
+    cm = compute_confusion_matrix(model, val_ds, num_classes)
+    float_accuracy = np.trace(cm) / cm.sum()
     
     # Save everything
-    print("\n[7/7] Saving model and metadata...")
-    save_model_and_metadata(model, label_encoder, feature_names, scaler, args.output_dir)
+    print("\n[6/6] Saving model and metadata...")
+    save_model_and_metadata(model, label_encoder, feature_names, args.output_dir, args.keep_keras)
+    if not args.no_tflite:
+        try:
+            export_int8_tflite(args.output_dir, val_ds, float_accuracy)
+        except Exception as e:
+            print(f"⚠️  int8 TFLite export failed, the API will serve the SavedModel: {e}")
     plot_training_history(history, args.output_dir)
     
     try:
-        plot_confusion_matrix(y_val, y_pred, label_encoder.classes_, args.output_dir)
+        plot_confusion_matrix(cm, label_encoder.classes_, args.output_dir)
     except ImportError:
         print("⚠️  seaborn not installed, skipping confusion matrix plot")
     
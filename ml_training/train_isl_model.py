@@ -10,6 +10,8 @@ Author: Sign & Speak Team
 
 import os
 import json
+import hashlib
+import functools
 import numpy as np
 import cv2
 import mediapipe as mp
@@ -18,16 +20,42 @@ import tensorflow as tf
 from tensorflow import keras
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import LabelEncoder
-import matplotlib.pyplot as plt
 import argparse
+import multiprocessing
+
+from precision import configure_mixed_precision, loss_scale_optimizer
 
 # MediaPipe initialization
 mp_hands = mp.solutions.hands
-hands = mp_hands.Hands(
-    static_image_mode=True,
-    max_num_hands=1,
-    min_detection_confidence=0.5
-)
+
+# Images are downscaled so their longest side is at most this many pixels
+# before detection; landmarks are normalized, so results are unaffected
+MAX_IMAGE_DIM = 256
+MIN_DETECTION_CONFIDENCE = 0.5
+
+# Bump when extract_landmarks_from_image changes what it produces, so
+# cached landmark files from older extraction code are not reused
+LANDMARK_CACHE_VERSION = 2
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png'}
+
+@functools.lru_cache(maxsize=None)
+def get_hands():
+    """MediaPipe Hands instance for the current process, created on first use"""
+    return mp_hands.Hands(
+        static_image_mode=True,
+        max_num_hands=1,
+        min_detection_confidence=MIN_DETECTION_CONFIDENCE
+    )
+
+def _init_worker():
+    """Pool initializer: build this worker's Hands instance up front"""
+    get_hands()
+
+def _extract_task(task):
+    """Pool worker: (index, image_path) -> (index, landmarks or None)"""
+    idx, image_path = task
+    return idx, extract_landmarks_from_image(image_path)
 
 def extract_landmarks_from_image(image_path):
     """
@@ -42,11 +70,18 @@ def extract_landmarks_from_image(image_path):
         print(f"Warning: Could not read image {image_path}")
         return None
     
+    # Downscale large images; detection cost grows with pixel count
+    h, w = image.shape[:2]
+    scale = MAX_IMAGE_DIM / max(h, w)
+    if scale < 1:
+        image = cv2.resize(image, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    
     # Convert BGR to RGB
     image_rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
     
-    # Process with MediaPipe
-    results = hands.process(image_rgb)
+    # Process with MediaPipe (read-only input lets it skip a defensive copy)
+    image_rgb.flags.writeable = False
+    results = get_hands().process(image_rgb)
     
     if not results.multi_hand_landmarks:
         return None
@@ -54,14 +89,26 @@ def extract_landmarks_from_image(image_path):
     # Extract first hand's landmarks
     hand_landmarks = results.multi_hand_landmarks[0]
     
-    # Flatten landmarks to 1D array
-    landmarks = []
-    for landmark in hand_landmarks.landmark:
-        landmarks.extend([landmark.x, landmark.y, landmark.z])
+    # Flatten landmarks into a preallocated (63,) array
+    landmarks = np.empty(63, dtype=np.float32)
+    for i, landmark in enumerate(hand_landmarks.landmark):
+        landmarks[3 * i] = landmark.x
+        landmarks[3 * i + 1] = landmark.y
+        landmarks[3 * i + 2] = landmark.z
     
-    return np.array(landmarks)
+    return landmarks
 
-def load_dataset_from_images(dataset_path):
+def dataset_fingerprint(dataset_path, image_paths):
+    """Hash the extraction settings, the dataset path and every image's path and mtime"""
+    digest = hashlib.sha1(
+        f"v{LANDMARK_CACHE_VERSION}:{MAX_IMAGE_DIM}:{MIN_DETECTION_CONFIDENCE}:".encode()
+    )
+    digest.update(str(Path(dataset_path).resolve()).encode())
+    for image_path in sorted(image_paths):
+        digest.update(f"{image_path}:{os.stat(image_path).st_mtime_ns}".encode())
+    return digest.hexdigest()[:16]
+
+def load_dataset_from_images(dataset_path, num_workers=None, cache_dir=None):
     """
     Load ISL dataset from folder structure:
     dataset_path/
@@ -72,6 +119,13 @@ def load_dataset_from_images(dataset_path):
             image1.jpg
         ...
     
+    Landmark extraction runs in a pool of worker processes, each with its
+    own MediaPipe Hands instance (num_workers defaults to the CPU count).
+    
+    When cache_dir is given, extracted landmarks are saved there as
+    landmarks_<fingerprint>.npz and reused on later runs until any image
+    is added, removed or modified.
+    
     Returns:
         X: numpy array of landmarks (n_samples, 63)
         y: numpy array of labels (n_samples,)
@@ -79,8 +133,8 @@ def load_dataset_from_images(dataset_path):
     """
     dataset_path = Path(dataset_path)
     
-    X = []
-    y = []
+    image_paths = []
+    image_classes = []
     label_names = []
     
     # Get all class folders
@@ -95,25 +149,75 @@ def load_dataset_from_images(dataset_path):
         class_name = class_folder.name
         label_names.append(class_name)
         
-        # Get all images in this class
-        image_files = list(class_folder.glob('*.jpg')) + \
-                     list(class_folder.glob('*.jpeg')) + \
-                     list(class_folder.glob('*.png'))
-        
-        print(f"Processing class '{class_name}': {len(image_files)} images...")
+        # Get all images in this class with a single directory scan
+        with os.scandir(class_folder) as entries:
+            image_files = sorted(
+                Path(entry.path) for entry in entries
+                if entry.is_file(follow_symlinks=False)
+                and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            )
         
-        successful = 0
-        for img_path in image_files:
-            landmarks = extract_landmarks_from_image(img_path)
+        print(f"  Class '{class_name}': {len(image_files)} images")
+        image_paths.extend(image_files)
+        image_classes.extend([class_idx] * len(image_files))
+    
+    cache_path = None
+    if cache_dir is not None:
+        cache_path = Path(cache_dir) / f"landmarks_{dataset_fingerprint(dataset_path, image_paths)}.npz"
+        if cache_path.exists():
+            cached = np.load(cache_path)
+            print(f"\n✓ Loaded cached landmarks from {cache_path}")
+            return cached['X'], cached['y'], cached['labels'].tolist()
+    
+    # Write landmarks straight into a preallocated array by image index, so
+    # the result is deterministic even though workers finish out of order
+    X = np.empty((len(image_paths), 63), dtype=np.float32)
+    y = np.array(image_classes, dtype=np.int64)
+    found = np.zeros(len(image_paths), dtype=bool)
+    
+    num_workers = num_workers or os.cpu_count()
+    print(f"\nExtracting landmarks from {len(image_paths)} images with {num_workers} workers...")
+    
+    tasks = list(enumerate(image_paths))
+    pool = None
+    if num_workers == 1:
+        results = map(_extract_task, tasks)
+    else:
+        pool = multiprocessing.Pool(num_workers, initializer=_init_worker)
+        results = pool.imap_unordered(_extract_task, tasks, chunksize=32)
+    
+    try:
+        for idx, landmarks in results:
             if landmarks is not None:
-                X.append(landmarks)
-                y.append(class_idx)
-                successful += 1
-        
-        print(f"  ✓ Successfully extracted landmarks from {successful}/{len(image_files)} images")
-    
-    X = np.array(X)
-    y = np.array(y)
+                X[idx] = landmarks
+                found[idx] = True
+    except BaseException:
+        # Don't wait for the remaining tasks (or leak workers) on error / Ctrl+C
+        if pool is not None:
+            pool.terminate()
+        raise
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+        else:
+            get_hands().close()
+            get_hands.cache_clear()
+    
+    totals = np.bincount(y, minlength=len(label_names))
+    successes = np.bincount(y[found], minlength=len(label_names))
+    print("\n".join(
+        f"  ✓ {name}: extracted landmarks from {ok}/{total} images"
+        for name, ok, total in zip(label_names, successes, totals)
+    ))
+    
+    X = X[found]
+    y = y[found]
+    
+    if cache_path is not None:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        np.savez_compressed(cache_path, X=X, y=y, labels=np.array(label_names))
+        print(f"✓ Cached landmarks to {cache_path}")
     
     print(f"\nDataset loaded:")
     print(f"  Total samples: {len(X)}")
@@ -122,6 +226,24 @@ def load_dataset_from_images(dataset_path):
     
     return X, y, label_names
 
+def make_dataset(X, y, batch_size, shuffle=False):
+    """
+    Wrap arrays in a cached, batched and prefetched tf.data pipeline
+    """
+    # Accepts arrays or tensors; tf.cast is a no-op when dtypes already match
+    X = tf.cast(tf.convert_to_tensor(X), tf.float32)
+    y = tf.cast(tf.convert_to_tensor(y), tf.int32)
+    ds = tf.data.Dataset.from_tensor_slices((X, y)).cache()
+    if shuffle:
+        ds = ds.shuffle(X.shape[0], reshuffle_each_iteration=True)
+    ds = ds.batch(batch_size).prefetch(tf.data.AUTOTUNE)
+    
+    options = tf.data.Options()
+    # Validation batches must keep their order to line up with labels
+    options.deterministic = not shuffle
+    options.experimental_optimization.map_and_batch_fusion = True
+    return ds.with_options(options)
+
 def create_model(num_classes, input_shape=(63,)):
     """
     Create a neural network for ISL classification
@@ -144,14 +266,17 @@ def create_model(num_classes, input_shape=(63,)):
         keras.layers.Dense(32, activation='relu'),
         keras.layers.Dropout(0.2),
         
-        # Output layer
-        keras.layers.Dense(num_classes, activation='softmax')
+        # Output layer (float32 under mixed precision, see precision.py)
+        keras.layers.Dense(num_classes, activation='softmax', dtype='float32')
     ])
     
+    optimizer = loss_scale_optimizer(keras.optimizers.Adam(learning_rate=0.001))
+    
     model.compile(
-        optimizer=keras.optimizers.Adam(learning_rate=0.001),
+        optimizer=optimizer,
         loss='sparse_categorical_crossentropy',
-        metrics=['accuracy']
+        metrics=['accuracy'],
+        jit_compile=True  # XLA fuses each Dense+ReLU with the following Dropout
     )
     
     return model
@@ -160,6 +285,9 @@ def plot_training_history(history, output_dir):
     """
     Plot training and validation metrics
     """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
     fig, (ax1, ax2) = plt.subplots(1, 2, figsize=(12, 4))
     
     # Accuracy plot
@@ -222,6 +350,10 @@ def main():
                        help='Batch size for training')
     parser.add_argument('--test_size', type=float, default=0.2,
                        help='Fraction of data to use for validation')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Processes for landmark extraction (default: CPU count)')
+    parser.add_argument('--no_cache', action='store_true',
+                       help='Always re-extract landmarks instead of using the .npz cache')
     
     args = parser.parse_args()
     
@@ -229,9 +361,19 @@ def main():
     print("ISL Hand Sign Classifier Training")
     print("="*60)
     
+    policy = configure_mixed_precision()
+    print(f"\n⚙️  Precision policy: {policy}")
+    tf.config.optimizer.set_experimental_options({
+        'layout_optimizer': True,
+        'remapping': True
+    })
+    
     # Load dataset
     print("\n[1/5] Loading dataset...")
-    X, y, label_names = load_dataset_from_images(args.dataset_path)
+    X, y, label_names = load_dataset_from_images(
+        args.dataset_path, args.workers,
+        cache_dir=None if args.no_cache else args.output_dir
+    )
     
     if len(X) == 0:
         print("Error: No valid samples found!")
@@ -246,6 +388,9 @@ def main():
     print(f"  Training samples: {len(X_train)}")
     print(f"  Validation samples: {len(X_val)}")
     
+    train_ds = make_dataset(X_train, y_train, args.batch_size, shuffle=True)
+    val_ds = make_dataset(X_val, y_val, args.batch_size)
+    
     # Create model
     print("\n[3/5] Creating model...")
     model = create_model(num_classes=len(label_names))
@@ -254,10 +399,9 @@ def main():
     # Train model
     print("\n[4/5] Training model...")
     history = model.fit(
-        X_train, y_train,
-        validation_data=(X_val, y_val),
+        train_ds,
+        validation_data=val_ds,
         epochs=args.epochs,
-        batch_size=args.batch_size,
         callbacks=[
             keras.callbacks.EarlyStopping(
                 monitor='val_loss',
@@ -272,10 +416,11 @@ def main():
         ]
     )
     
-    # Evaluate
+    # Evaluate (metrics of the best epoch, whose weights EarlyStopping restored)
     print("\n[5/5] Evaluating model...")
-    train_loss, train_acc = model.evaluate(X_train, y_train, verbose=0)
-    val_loss, val_acc = model.evaluate(X_val, y_val, verbose=0)
+    best_epoch = int(np.argmin(history.history['val_loss']))
+    train_acc = history.history['accuracy'][best_epoch]
+    val_acc = history.history['val_accuracy'][best_epoch]
     
     print(f"\nFinal Results:")
     print(f"  Training Accuracy: {train_acc*100:.2f}%")